@@ -0,0 +1,106 @@
+import os
+import json
+from collections import namedtuple
+
+# Everything the game needs to know about pacing at a given score
+Level = namedtuple('Level', ['tick_rate', 'points', 'bw_mode', 'obstacles', 'max_obstacles', 'completed'])
+
+# Original pacing: 50% speed, 75% at 50, B&W with double points at 100,
+# obstacles and double speed at 200, completed at 300
+CLASSIC = {
+    'name': 'classic',
+    'complete_at': 300,
+    'levels': [
+        {'from': 0, 'tick_rate': 5, 'points': 10},
+        {'from': 50, 'tick_rate': 7.5, 'points': 10},
+        {'from': 100, 'tick_rate': 10, 'points': 20, 'bw_mode': True},
+        {'from': 200, 'tick_rate': 20, 'points': 20, 'bw_mode': True, 'obstacles': True, 'max_obstacles': 10},
+    ]
+}
+
+class Schedule:
+    def __init__(self, spec):
+        self.spec = spec  # Kept so snapshots and replays can carry the whole mode
+        self.name = spec['name']
+        self.complete_at = spec.get('complete_at')  # None for a mode that never ends
+
+        levels = sorted(spec['levels'], key=lambda level: level['from'])
+        if not levels or levels[0]['from'] != 0:
+            raise ValueError(f"Schedule '{self.name}' needs a level starting at score 0")
+
+        # Compile once into one entry per score so the game loop does a single index
+        last_score = self.complete_at if self.complete_at is not None else levels[-1]['from']
+        self.table = []
+        index = 0
+        for score in range(last_score + 1):
+            while index + 1 < len(levels) and levels[index + 1]['from'] <= score:
+                index += 1
+            level = levels[index]
+            self.table.append(Level(
+                tick_rate=level['tick_rate'],
+                points=level['points'],
+                bw_mode=level.get('bw_mode', False),
+                obstacles=level.get('obstacles', False),
+                max_obstacles=level.get('max_obstacles', 10),
+                completed=self.complete_at is not None and score >= self.complete_at
+            ))
+        self.last = len(self.table) - 1
+
+    def lookup(self, score):
+        # Scores past the end of the table keep the final level
+        return self.table[score if score < self.last else self.last]
+
+    def describe(self):
+        # Rule lines for the rules screen: the starting level, then what changes at each later one,
+        # kept short enough to fit the starting window
+        levels = sorted(self.spec['levels'], key=lambda level: level['from'])
+        first = levels[0]
+        lines = [f"Each food is worth {first['points']} points"]
+        if first.get('bw_mode', False):
+            lines.append("The game is played in B&W")
+        if first.get('obstacles', False):
+            lines.append("Obstacles appear from the start")
+
+        previous = first
+        for level in levels[1:]:
+            if self.complete_at is not None and level['from'] >= self.complete_at:
+                break
+            changes = []
+            if level.get('bw_mode', False) != previous.get('bw_mode', False):
+                changes.append("B&W" if level.get('bw_mode', False) else "colour")
+            if level.get('obstacles', False) != previous.get('obstacles', False):
+                changes.append("obstacles" if level.get('obstacles', False) else "no obstacles")
+            if level['points'] != previous['points']:
+                changes.append(f"{level['points']} per food")
+            if level['tick_rate'] != previous['tick_rate']:
+                changes.append("faster" if level['tick_rate'] > previous['tick_rate'] else "slower")
+            if changes:
+                lines.append(f"At {level['from']} points: " + ", ".join(changes))
+            previous = level
+
+        if self.complete_at is not None:
+            lines.append(f"Complete the game at {self.complete_at} points")
+        else:
+            lines.append("No finish line: play for the high score")
+        return lines
+
+def load_schedule(path):
+    with open(path, 'r') as f:
+        return Schedule(json.load(f))
+
+SCHEDULES = {'classic': Schedule(CLASSIC)}
+
+def schedule_from_spec(spec):
+    # Reuse the built-in schedule when the spec is unchanged, otherwise compile it
+    schedule = SCHEDULES.get(spec['name'])
+    if schedule is not None and schedule.spec == spec:
+        return schedule
+    return Schedule(spec)
+
+def get_schedule(mode):
+    # A built-in mode name, or the path to a JSON schedule in the same format as CLASSIC
+    if mode in SCHEDULES:
+        return SCHEDULES[mode]
+    if os.path.exists(mode):
+        return load_schedule(mode)
+    raise ValueError(f"Unknown game mode '{mode}'")
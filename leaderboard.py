@@ -0,0 +1,114 @@
+import os
+import mmap
+import struct
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+LEADERBOARD_FILE = 'snake_scores.dat'
+LEGACY_SCORES_FILE = 'snake_scores.txt'
+MAX_RECORDS = 25
+
+# File layout: fixed header followed by MAX_RECORDS fixed-size score records
+MAGIC = b'SNKL'
+VERSION = 1
+HEADER = struct.Struct('<4sIQI')  # magic, version, generation, record count
+HEADER_SIZE = 32
+GENERATION_OFFSET = 8
+RECORD = struct.Struct('<64si32s')  # username, score, date/time (UTF-8, zero padded)
+FILE_SIZE = HEADER_SIZE + RECORD.size * MAX_RECORDS
+
+class Leaderboard:
+    def __init__(self, path=LEADERBOARD_FILE, legacy_path=LEGACY_SCORES_FILE):
+        self.path = path
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT | getattr(os, 'O_BINARY', 0), 0o644)
+
+        # First instance to get here lays out the file and imports the old text scores
+        with self._lock(shared=False):
+            if os.fstat(self.fd).st_size < FILE_SIZE:
+                os.ftruncate(self.fd, FILE_SIZE)
+                self.map = mmap.mmap(self.fd, FILE_SIZE)
+                self._write(self._read_legacy(legacy_path), 0)
+            else:
+                self.map = mmap.mmap(self.fd, FILE_SIZE)
+                magic, version, _, _ = HEADER.unpack_from(self.map, 0)
+                if magic != MAGIC or version != VERSION:
+                    raise ValueError(f"{path} is not a version {VERSION} leaderboard file")
+
+    @property
+    def generation(self):
+        # Bumped on every write, so a changed value means the records need rereading
+        return struct.unpack_from('<Q', self.map, GENERATION_OFFSET)[0]
+
+    def read(self):
+        # Return (generation, scores) as one consistent snapshot
+        with self._lock(shared=True):
+            return self._read_records()
+
+    def add(self, score_data):
+        # Merge into whatever other instances have written since our last read
+        with self._lock(shared=False):
+            generation, scores = self._read_records()
+            scores.append(score_data)
+            scores = sorted(scores, key=lambda x: x['score'], reverse=True)[:MAX_RECORDS]
+            self._write(scores, generation + 1)
+        return generation + 1
+
+    def close(self):
+        self.map.close()
+        os.close(self.fd)
+
+    def _read_records(self):
+        _, _, generation, count = HEADER.unpack_from(self.map, 0)
+        scores = []
+        for i in range(min(count, MAX_RECORDS)):
+            username, score, date_time = RECORD.unpack_from(self.map, HEADER_SIZE + i * RECORD.size)
+            scores.append({
+                'username': username.rstrip(b'\0').decode('utf-8', 'ignore'),
+                'score': score,
+                'date_time': date_time.rstrip(b'\0').decode('utf-8', 'ignore')
+            })
+        return generation, scores
+
+    def _write(self, scores, generation):
+        # Records first, header last, so the new generation is published with complete data
+        for i, score_data in enumerate(scores):
+            RECORD.pack_into(self.map, HEADER_SIZE + i * RECORD.size,
+                             score_data['username'].encode('utf-8'),
+                             score_data['score'],
+                             score_data['date_time'].encode('utf-8'))
+        HEADER.pack_into(self.map, 0, MAGIC, VERSION, generation, len(scores))
+        self.map.flush()
+
+    def _read_legacy(self, legacy_path):
+        scores = []
+        try:
+            with open(legacy_path, 'r') as f:
+                for line in f:
+                    username, score, date_time = line.strip().split('|')
+                    scores.append({'username': username, 'score': int(score), 'date_time': date_time})
+        except FileNotFoundError:
+            pass
+        return sorted(scores, key=lambda x: x['score'], reverse=True)[:MAX_RECORDS]
+
+    @contextmanager
+    def _lock(self, shared):
+        # Advisory lock on the whole file; Windows only has exclusive byte-range locks
+        if fcntl is not None:
+            fcntl.flock(self.fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self.fd, fcntl.LOCK_UN)
+        else:
+            os.lseek(self.fd, 0, os.SEEK_SET)
+            msvcrt.locking(self.fd, msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                os.lseek(self.fd, 0, os.SEEK_SET)
+                msvcrt.locking(self.fd, msvcrt.LK_UNLCK, 1)
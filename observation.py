@@ -0,0 +1,178 @@
+import numpy as np
+
+import snake_game
+
+# Cell codes in the occupancy window
+EMPTY = 0
+BODY = 1
+OBSTACLE = 2
+FOOD = 3
+WALL = 4
+RESERVED = 5  # Score rows: the snake may enter them but food and obstacles never spawn there
+
+# Layout of the feature vector
+FOOD_DX, FOOD_DY, FOOD_DISTANCE = 0, 1, 2
+RAY_UP, RAY_RIGHT, RAY_DOWN, RAY_LEFT = 3, 4, 5, 6
+DIRECTION_X, DIRECTION_Y, LENGTH = 7, 8, 9
+NUM_FEATURES = 10
+
+class ObservationEncoder:
+    def __init__(self, game, radius=3):
+        self.radius = radius
+        self.features = np.zeros(NUM_FEATURES, dtype=np.float32)
+        self.window = np.zeros((2 * radius + 1, 2 * radius + 1), dtype=np.int8)
+        self.width = self.height = None
+        self.reset(game)
+
+    def reset(self, game):
+        # Rebuild everything from the full game state
+        width, height = snake_game.get_grid_width(), snake_game.get_grid_height()
+        if (width, height) != (self.width, self.height):
+            self._allocate(width, height)
+
+        np.copyto(self.cells, self.background)
+        self.blocked.fill(0)
+        self.obstacles = game.obstacles
+        for pos in self.obstacles:
+            self._set(int(pos.x), int(pos.y), OBSTACLE)
+        for block in game.snake.body:
+            self._set(int(block.x), int(block.y), BODY)
+        self.food = (int(game.food.pos.x), int(game.food.pos.y))
+        self._set(*self.food, FOOD)
+        body = game.snake.body
+        self.head = (int(body[0].x), int(body[0].y))
+        self.tail = (int(body[-1].x), int(body[-1].y))
+        self.length = len(body)
+
+        self._encode(game)
+        return self.features, self.window
+
+    def step(self, game):
+        # Apply one tick of changes; anything that doesn't look like a plain move falls back to reset
+        body = game.snake.body
+        head = (int(body[0].x), int(body[0].y))
+
+        if (snake_game.get_grid_width(), snake_game.get_grid_height()) != (self.width, self.height):
+            return self.reset(game)
+
+        tail = (int(body[-1].x), int(body[-1].y))
+        if head != self.head or tail != self.tail or len(body) != self.length:
+            # A plain move adds one head next to the old one and either grows or drops exactly our old tail
+            removed = game.snake.removed_tail
+            grew = removed is None
+            if (len(body) < 2 or len(body) != self.length + grew
+                    or (int(body[1].x), int(body[1].y)) != self.head
+                    or (not grew and (int(removed.x), int(removed.y)) != self.tail)):
+                return self.reset(game)
+            if not grew:
+                self._clear(*self.tail)
+            self._set(*head, BODY)
+            self.head, self.tail, self.length = head, tail, len(body)
+
+        if game.obstacles is not self.obstacles:
+            for pos in self.obstacles:
+                self._clear(int(pos.x), int(pos.y), OBSTACLE)
+            self.obstacles = game.obstacles
+            for pos in self.obstacles:
+                self._set(int(pos.x), int(pos.y), OBSTACLE)
+
+        food = (int(game.food.pos.x), int(game.food.pos.y))
+        if food != self.food:
+            self._clear(*self.food, FOOD)
+            self.food = food
+            self._set(*food, FOOD)
+
+        self._encode(game)
+        return self.features, self.window
+
+    def _allocate(self, width, height):
+        r = self.radius
+        self.width, self.height = width, height
+
+        # Padded by the window radius: wrapped copies left and right, walls above and below
+        self.background = np.full((height + 2 * r, width + 2 * r), WALL, dtype=np.int8)
+        self.background[r:r + height, :] = EMPTY
+        self.background[r:r + snake_game.SCORE_ROWS, :] = RESERVED
+        self.cells = self.background.copy()
+
+        # Unpadded grid of cells that end a ray
+        self.blocked = np.zeros((height, width), dtype=np.uint8)
+
+    def _set(self, x, y, code):
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return
+        # Food is drawn under the snake, never over it
+        if code == FOOD and self.blocked[y, x]:
+            return
+
+        r = self.radius
+        self.cells[y + r, x + r] = code
+        if x < r:
+            self.cells[y + r, x + self.width + r] = code
+        if x >= self.width - r:
+            self.cells[y + r, x - self.width + r] = code
+        self.blocked[y, x] = code in (BODY, OBSTACLE)
+
+    def _clear(self, x, y, code=BODY):
+        # Only clear cells still holding code, so overlapping updates don't erase each other
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return
+        r = self.radius
+        if self.cells[y + r, x + r] == code:
+            self._set(x, y, self.background[y + r, x + r])
+            # Food can sit under the snake (e.g. right after a reset) and shows again once uncovered
+            if (x, y) == self.food:
+                self._set(x, y, FOOD)
+
+    def _ray(self, segment):
+        # Distance to the first blocked cell along segment, or None if it is clear
+        if segment.size:
+            index = int(segment.argmax())
+            if segment[index]:
+                return index + 1
+        return None
+
+    def _encode(self, game):
+        features = self.features
+        x, y = self.head
+        width, height = self.width, self.height
+
+        # Horizontal distance takes the short way round the wrap
+        dx = (self.food[0] - x + width // 2) % width - width // 2
+        dy = self.food[1] - y
+        features[FOOD_DX] = dx
+        features[FOOD_DY] = dy
+        features[FOOD_DISTANCE] = abs(dx) + abs(dy)
+        features[DIRECTION_X] = game.snake.direction.x
+        features[DIRECTION_Y] = game.snake.direction.y
+        features[LENGTH] = len(game.snake.body)
+
+        if not (0 <= y < height):
+            # Head has left the board (game over), nothing meaningful to cast
+            features[RAY_UP:RAY_LEFT + 1] = 0
+            self.window.fill(WALL)
+            return
+
+        blocked = self.blocked
+        empty = blocked[y, :0]
+
+        # Top and bottom are walls just off the board
+        up = self._ray(blocked[y - 1::-1, x] if y else empty)
+        features[RAY_UP] = y + 1 if up is None else up
+        down = self._ray(blocked[y + 1:, x])
+        features[RAY_DOWN] = height - y if down is None else down
+
+        # Left and right wrap round; at worst the ray comes back to the head itself
+        right = self._ray(blocked[y, x + 1:])
+        if right is None:
+            right = self._ray(blocked[y, :x])
+            right = width if right is None else width - x - 1 + right
+        features[RAY_RIGHT] = right
+        left = self._ray(blocked[y, x - 1::-1] if x else empty)
+        if left is None:
+            left = self._ray(blocked[y, :x:-1])
+            left = width if left is None else x + left
+        features[RAY_LEFT] = left
+
+        size = 2 * self.radius + 1
+        np.copyto(self.window, self.cells[y:y + size, x:x + size])
@@ -0,0 +1,175 @@
+import os
+import sys
+import json
+import time
+import argparse
+import multiprocessing
+
+# Every recorded tick is a complete frame, so any frame can start an export range
+DEFAULT_RANGE_SIZE = 250
+
+# Raw dumps are written straight from the 32-bit surface buffer (X8R8G8B8 pixels)
+RAW_MASKS = (0xFF0000, 0x00FF00, 0x0000FF, 0)
+RAW_PIXEL_FORMAT = 'bgr0' if sys.byteorder == 'little' else '0rgb'
+
+class ReplayRecorder:
+    def __init__(self):
+        # Size and mode are taken from the first captured frame, the way the game was actually played
+        self.width = None
+        self.height = None
+        self.schedule = None  # Spec of the game mode, for reference; frames don't depend on it
+        self.frames = []
+
+    def capture(self, game, width, height):
+        if not self.frames:
+            self.width, self.height = width, height
+            self.schedule = game.schedule.spec
+        # Store plain ints/tuples so frames pickle and serialize cheaply
+        self.frames.append([
+            [(int(block.x), int(block.y)) for block in game.snake.body],
+            (int(game.snake.direction.x), int(game.snake.direction.y)),
+            (int(game.food.pos.x), int(game.food.pos.y)),
+            tuple(game.food.color),
+            [(int(pos.x), int(pos.y)) for pos in game.obstacles],
+            game.score,
+            game.high_score,
+            game.bw_mode,
+            game.level.obstacles,
+        ])
+
+    def save(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump({'width': self.width, 'height': self.height, 'schedule': self.schedule, 'frames': self.frames},
+                      f, separators=(',', ':'))
+
+def load_replay(path):
+    with open(path, 'r') as f:
+        return json.load(f)
+
+# Per-process render state, set up once by _init_worker
+_game = None
+_surface = None
+
+def _init_worker(width, height):
+    global _game, _surface
+
+    # Render offscreen without opening a window
+    os.environ['SDL_VIDEODRIVER'] = 'dummy'
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    # Leave SIGTERM alone so the pool can still terminate workers after an error
+    os.environ['SDL_NO_SIGNAL_HANDLERS'] = '1'
+
+    import pygame
+    import snake_game
+
+    # Point the game's drawing code at an offscreen surface of the recorded size
+    _surface = pygame.Surface((width, height), 0, 32, RAW_MASKS)
+    snake_game.screen = _surface
+    snake_game.SCREEN_WIDTH = width
+    snake_game.SCREEN_HEIGHT = height
+
+    # Frames carry everything drawing needs, so the game mode doesn't matter here
+    _game = snake_game.Game(leaderboard=None)
+    _game.main_menu = False
+    _game.game_started = True
+
+def _apply_frame(frame):
+    from pygame.math import Vector2
+
+    body, direction, food, color, obstacles, score, high_score, bw_mode, obstacles_active = frame
+    _game.snake.body = [Vector2(x, y) for x, y in body]
+    _game.snake.direction = Vector2(direction)
+    _game.food.pos = Vector2(food)
+    _game.food.color = tuple(color)
+    _game.obstacles = [Vector2(x, y) for x, y in obstacles]
+    _game.score = score
+    _game.level = _game.level._replace(obstacles=obstacles_active)
+    _game.high_score = high_score
+    _game.bw_mode = bw_mode
+
+def _render_range(task):
+    import pygame
+
+    start, frames, out_dir, fmt = task
+
+    if fmt == 'raw':
+        # Each worker writes its own slice of the preallocated frame file
+        frame_size = _surface.get_pitch() * _surface.get_height()
+        f = open(os.path.join(out_dir, 'frames.raw'), 'r+b')
+        f.seek(start * frame_size)
+
+    try:
+        for i, frame in enumerate(frames):
+            _apply_frame(frame)
+            _game.draw_elements()
+
+            if fmt == 'raw':
+                # Hand the surface's own pixel buffer to the file without copying it
+                view = _surface.get_view('1')
+                f.write(view)
+                del view  # Release the surface lock before the next draw
+            else:
+                pygame.image.save(_surface, os.path.join(out_dir, f'frame_{start + i:06d}.png'))
+    finally:
+        if fmt == 'raw':
+            f.close()
+
+    return len(frames)
+
+def export_replay(replay, out_dir, fmt='png', workers=None, range_size=DEFAULT_RANGE_SIZE):
+    width, height = replay['width'], replay['height']
+    frames = replay['frames']
+    workers = workers or os.cpu_count() or 1
+
+    os.makedirs(out_dir, exist_ok=True)
+
+    if fmt == 'raw':
+        # Preallocate so workers can write their ranges in any order
+        frame_size = width * 4 * height
+        with open(os.path.join(out_dir, 'frames.raw'), 'wb') as f:
+            f.truncate(frame_size * len(frames))
+
+    tasks = [(start, frames[start:start + range_size], out_dir, fmt)
+             for start in range(0, len(frames), range_size)]
+
+    # Spawn rather than fork so workers never inherit the caller's pygame/SDL signal handlers
+    context = multiprocessing.get_context('spawn')
+    rendered = 0
+    with context.Pool(workers, initializer=_init_worker, initargs=(width, height)) as pool:
+        for count in pool.imap_unordered(_render_range, tasks):
+            rendered += count
+        # Let workers exit on their own instead of relying on terminate()
+        pool.close()
+        pool.join()
+    return rendered
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a recorded Snake game to image frames")
+    parser.add_argument('replay', help="replay file written with snake_game.py --record")
+    parser.add_argument('out_dir', help="directory for the exported frames")
+    parser.add_argument('--format', choices=['png', 'raw'], default='png', dest='fmt',
+                        help="one PNG per frame, or a single raw video file")
+    parser.add_argument('--workers', type=int, default=None, help="number of render processes")
+    parser.add_argument('--range-size', type=int, default=DEFAULT_RANGE_SIZE,
+                        help="frames handed to a worker at a time")
+    parser.add_argument('--start', type=int, default=0, help="first frame to export")
+    parser.add_argument('--end', type=int, default=None, help="frame to stop before")
+    args = parser.parse_args()
+
+    replay = load_replay(args.replay)
+    replay['frames'] = replay['frames'][args.start:args.end]
+
+    start_time = time.perf_counter()
+    rendered = export_replay(replay, args.out_dir, args.fmt, args.workers, args.range_size)
+    elapsed = time.perf_counter() - start_time
+
+    print(f"Exported {rendered} frames in {elapsed:.2f}s ({rendered / max(elapsed, 1e-9):.0f} frames/s)")
+    if args.fmt == 'raw':
+        print(f"ffmpeg -f rawvideo -pix_fmt {RAW_PIXEL_FORMAT} -s {replay['width']}x{replay['height']} "
+              f"-r 10 -i {os.path.join(args.out_dir, 'frames.raw')} highlight.mp4")
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,9 @@ import random
 import time
 import os
 from pygame.math import Vector2
+from leaderboard import Leaderboard, LEADERBOARD_FILE
+from difficulty import get_schedule
+import snapshot
 
 # Initialize pygame
 pygame.init()
@@ -18,6 +21,7 @@ NOKIA_GREEN = (170, 215, 81)
 BLACK = (0, 0, 0)
 WHITE = (255, 255, 255)
 FPS = 10
+SCORE_ROWS = 2  # Top rows kept clear of food and obstacles for the score display
 
 # Helper functions for dynamic grid dimensions
 def get_grid_width():
@@ -57,6 +61,7 @@ class Snake:
         self.body = [Vector2(5, 10), Vector2(4, 10), Vector2(3, 10)]
         self.direction = Vector2(1, 0)
         self.new_block = False
+        self.removed_tail = None  # Cell vacated by the last move, None if the snake grew
         
     def draw(self, color_mode):
         # Draw head with triangle
@@ -110,7 +115,9 @@ class Snake:
             body_copy.insert(0, body_copy[0] + self.direction)
             self.body = body_copy
             self.new_block = False
+            self.removed_tail = None
         else:
+            self.removed_tail = self.body[-1]
             body_copy = self.body[:-1]
             body_copy.insert(0, body_copy[0] + self.direction)
             self.body = body_copy
@@ -135,6 +142,7 @@ class Snake:
         self.body = [Vector2(mid_x, mid_y), Vector2(mid_x-1, mid_y), Vector2(mid_x-2, mid_y)]
         self.direction = Vector2(1, 0)
         self.new_block = False
+        self.removed_tail = None
     
     def check_collision(self):
         # Check if snake hits itself
@@ -167,8 +175,8 @@ class Food:
             self.x = random.randint(0, grid_width - 1)
             self.y = random.randint(0, grid_height - 1)
             
-            # Avoid top area where score is displayed (first 2 rows)
-            if self.y >= 2:
+            # Avoid top area where score is displayed
+            if self.y >= SCORE_ROWS:
                 break
         
         self.pos = Vector2(self.x, self.y)
@@ -188,12 +196,14 @@ class Food:
             # If we got here, the color was too green, try again
 
 class Game:
-    def __init__(self):
+    def __init__(self, mode='classic', leaderboard=LEADERBOARD_FILE):
+        self.schedule = get_schedule(mode)  # Pacing and rules, compiled to a table by score
         self.snake = Snake()
         self.food = Food()
         self.obstacles = []  # List to store obstacles
         self.obstacle_count = 0  # Track number of obstacles to show
         self.score = 0
+        self.level = self.schedule.lookup(self.score)
         self.high_score = 0
         self.game_over = False
         self.game_started = False
@@ -207,24 +217,25 @@ class Game:
         self.show_rules = False
         self.show_leaderboard = False
         self.scores_history = []  # List to store historical scores
+        # Shared with other instances on this machine; pass a Leaderboard to reuse one, or None for no scores
+        self.leaderboard = Leaderboard(leaderboard) if isinstance(leaderboard, str) else leaderboard
+        self.scores_generation = None  # Leaderboard generation scores_history was read at
         self.session_scores = {}  # Dictionary to store scores for current session
+        self.recorder = None  # Replay recorder, only set when recording is enabled
+        self.replay_dir = None
+        self.place_food()  # Keep the first food off the starting snake
         self.load_scores_history()  # Load previous scores
         
     def load_scores_history(self):
-        try:
-            with open('snake_scores.txt', 'r') as f:
-                lines = f.readlines()
-                for line in lines:
-                    username, score, date_time = line.strip().split('|')
-                    self.scores_history.append({
-                        'username': username,
-                        'score': int(score),
-                        'date_time': date_time
-                    })
-                # Keep only last 25 scores
-                self.scores_history = self.scores_history[-25:]
-        except FileNotFoundError:
-            self.scores_history = []
+        if self.leaderboard is None:
+            self.scores_generation, self.scores_history = None, []
+            return
+        self.scores_generation, self.scores_history = self.leaderboard.read()
+    
+    def refresh_scores_history(self):
+        # Only reread when another instance (or this one) has written new scores
+        if self.leaderboard is not None and self.leaderboard.generation != self.scores_generation:
+            self.load_scores_history()
     
     def save_scores_history(self):
         # Update session best score if needed
@@ -235,26 +246,19 @@ class Game:
             self.session_scores[self.username] = self.score
         
         # Only save if this is the best score for this session
-        if self.score == self.session_scores[self.username]:
+        if self.leaderboard is not None and self.score == self.session_scores[self.username]:
             from datetime import datetime
             current_time = datetime.now().strftime("%I:%M:%S %p")  # 12-hour format with AM/PM
             current_date = datetime.now().strftime("%Y-%m-%d")
             formatted_datetime = f"{current_date} {current_time}"
             
-            # Add new score
-            self.scores_history.append({
+            # Add new score to the shared leaderboard, which keeps the top 25
+            self.leaderboard.add({
                 'username': self.username,
                 'score': self.score,
                 'date_time': formatted_datetime
             })
-            
-            # Keep only last 25 scores
-            self.scores_history = sorted(self.scores_history, key=lambda x: x['score'], reverse=True)[:25]
-            
-            # Save to file
-            with open('snake_scores.txt', 'w') as f:
-                for score_data in self.scores_history:
-                    f.write(f"{score_data['username']}|{score_data['score']}|{score_data['date_time']}\n")
+            self.load_scores_history()
 
     def handle_resize(self, new_width, new_height):
         # Calculate scaling factors
@@ -288,16 +292,46 @@ class Game:
         if not self.game_started or self.game_completed or self.game_paused:
             return  # Don't update anything if game hasn't started, is completed, or is paused
             
+        # One table lookup per tick; check_collision looks up again only when the score changes
+        self.level = self.schedule.lookup(self.score)
+        
         self.snake.move()
         self.check_collision()
         self.check_fail()
         
         # Update black and white mode
-        self.bw_mode = self.score >= 100
+        self.bw_mode = self.level.bw_mode
         
         # Check for game completion
-        if self.score >= 300:
+        if self.level.completed:
             self.game_completed = True
+        
+        # Record this tick for replay export
+        if self.recorder is not None:
+            if self.recorder.frames and (self.recorder.width, self.recorder.height) != (SCREEN_WIDTH, SCREEN_HEIGHT):
+                # The window was resized mid-game; every replay file is drawn at one size, so start a new one
+                self.finish_recording()
+            self.recorder.capture(self, SCREEN_WIDTH, SCREEN_HEIGHT)
+    
+    def start_recording(self, replay_dir):
+        from replay import ReplayRecorder
+        self.replay_dir = replay_dir
+        self.recorder = ReplayRecorder()
+    
+    def finish_recording(self):
+        # Write the finished game (or segment of one) to its own replay file and start a fresh recording
+        if self.recorder is None:
+            return
+        if self.recorder.frames:
+            base_name = time.strftime("replay_%Y%m%d_%H%M%S")
+            path = os.path.join(self.replay_dir, base_name + ".json")
+            suffix = 1
+            while os.path.exists(path):
+                # Several segments can finish within the same second
+                path = os.path.join(self.replay_dir, f"{base_name}_{suffix}.json")
+                suffix += 1
+            self.recorder.save(path)
+        self.start_recording(self.replay_dir)
     
     def draw_elements(self):
         # Draw background
@@ -323,8 +357,8 @@ class Game:
             self.draw_username_input()
         # Only draw snake and food if game has started and not completed
         elif self.game_started and not self.game_completed:
-            # Draw obstacles if score >= 200
-            if self.score >= 200:
+            # Draw obstacles once the level has them
+            if self.level.obstacles:
                 self.draw_obstacles()
                 
             self.snake.draw(self.bw_mode)
@@ -363,46 +397,53 @@ class Game:
     def check_collision(self):
         if self.food.pos == self.snake.body[0]:
             # Reposition food
-            self.food.randomize()
-            
-            # Make sure food doesn't appear on snake or obstacles
-            while self.food.pos in self.snake.body or self.food.pos in self.obstacles:
-                self.food.randomize()
+            self.place_food()
             
             # Grow snake
             self.snake.add_block()
             
-            # Increase score - double points in black & white mode
-            if self.bw_mode:
-                self.score += 20
-            else:
-                self.score += 10
+            # Increase score by the current level's points
+            self.score += self.level.points
+            self.level = self.schedule.lookup(self.score)
             
             # Update high score
             if self.score > self.high_score:
                 self.high_score = self.score
                 
-            # Increase obstacle count and generate new obstacles if score >= 200
-            if self.score >= 200:
+            # Increase obstacle count and generate new obstacles once the level has them
+            if self.level.obstacles:
                 self.obstacle_count += 1
                 self.generate_obstacles()
     
+    def run_in_progress(self):
+        # A run is being played (or is paused), not sitting behind a menu or an end screen
+        on_menu = self.main_menu or self.input_active or self.show_rules or self.show_leaderboard
+        return self.game_started and not on_menu and not self.game_over and not self.game_completed
+    
+    def place_food(self):
+        self.food.randomize()
+        
+        # Make sure food doesn't appear on snake or obstacles
+        while self.food.pos in self.snake.body or self.food.pos in self.obstacles:
+            self.food.randomize()
+    
     def check_fail(self):
         # Check if snake hits itself or walls
         if self.snake.check_collision():
             self.game_over = True
             
         # Check if snake hits obstacles
-        if self.score >= 200:
+        if self.level.obstacles:
             if self.snake.body[0] in self.obstacles:
                 self.game_over = True
     
     def reset(self):
         self.snake.reset()
-        self.food.randomize()
         self.obstacles = []  # Clear obstacles
+        self.place_food()
         self.obstacle_count = 0  # Reset obstacle count
         self.score = 0
+        self.level = self.schedule.lookup(self.score)
         self.game_over = False
         self.game_completed = False  # Reset game completed state
         self.game_started = True  # Keep the game started after reset
@@ -459,7 +500,7 @@ class Game:
         grid_height = get_grid_height()
         
         # Limit the maximum number of obstacles to prevent impossible gameplay
-        max_obstacles = min(self.obstacle_count, 10)
+        max_obstacles = min(self.obstacle_count, self.level.max_obstacles)
         
         # Generate obstacles based on obstacle_count
         for _ in range(max_obstacles):
@@ -469,7 +510,7 @@ class Game:
                 
                 # Generate random position
                 x = random.randint(0, grid_width - 1)
-                y = random.randint(2, grid_height - 1)  # Start from row 2 to avoid score area
+                y = random.randint(SCORE_ROWS, grid_height - 1)  # Start below the score area
                 pos = Vector2(x, y)
                 
                 # Make sure obstacle doesn't overlap with snake, food, or other obstacles
@@ -488,14 +529,7 @@ class Game:
     
     def get_game_speed(self):
         # Return game speed based on score
-        if self.score < 50:
-            return FPS / 2  # Half speed at start (50%)
-        elif self.score < 100:
-            return FPS * 0.75  # 75% speed at score 50
-        elif self.score < 200:
-            return FPS  # Normal speed at score 100 (100%)
-        else:
-            return FPS * 2  # Double speed at score 200 (200%)
+        return self.level.tick_rate
 
     def draw_username_input(self):
         # Draw title
@@ -558,6 +592,12 @@ class Game:
         leaderboard_text = font.render("Press l to View Leaderboard", True, BLACK if self.bw_mode else WHITE)
         leaderboard_rect = leaderboard_text.get_rect(center=(SCREEN_WIDTH/2, SCREEN_HEIGHT/2 + 30))
         screen.blit(leaderboard_text, leaderboard_rect)
+        
+        # Offer to continue a saved run
+        if snapshot.has_snapshot():
+            continue_text = font.render("Press c to Continue", True, BLACK if self.bw_mode else WHITE)
+            continue_rect = continue_text.get_rect(center=(SCREEN_WIDTH/2, SCREEN_HEIGHT/2 + 60))
+            screen.blit(continue_text, continue_rect)
     
     def draw_rules(self):
         # Draw title
@@ -565,24 +605,23 @@ class Game:
         title_rect = title_text.get_rect(center=(SCREEN_WIDTH/2, SCREEN_HEIGHT/6))
         screen.blit(title_text, title_rect)
         
-        # Draw rules
+        # Draw rules; scoring, levels and the finish come from the current game mode
         rules = [
             "Use WASD or Arrow keys to control the snake",
             "Eat food to grow and earn points",
-            "Each food is worth 10 points (20 in B&W mode)",
-            "Game turns B&W at 100 points",
-            "Obstacles appear at 200 points",
-            "Complete the game at 300 points",
+            *self.schedule.describe(),
             "Game over if snake hits itself or top/bottom walls",
             "Press SHIFT to pause/resume the game"
         ]
         
+        # Tighten the spacing for modes with many levels so the rules stay clear of the back prompt
         y_pos = SCREEN_HEIGHT/4
+        line_height = min(30, (SCREEN_HEIGHT - 80 - y_pos) / len(rules))
         for rule in rules:
             rule_text = font.render(rule, True, BLACK if self.bw_mode else WHITE)
             rule_rect = rule_text.get_rect(center=(SCREEN_WIDTH/2, y_pos))
             screen.blit(rule_text, rule_rect)
-            y_pos += 30
+            y_pos += line_height
         
         # Back to menu instruction
         back_text = font.render("Press 'ESC' to return to menu", True, BLACK if self.bw_mode else WHITE)
@@ -590,6 +629,8 @@ class Game:
         screen.blit(back_text, back_rect)
     
     def draw_leaderboard(self):
+        self.refresh_scores_history()
+        
         # Draw title with Blox BRK font
         title_text = font.render("LEADERBOARD", True, BLACK if self.bw_mode else WHITE)
         title_rect = title_text.get_rect(center=(SCREEN_WIDTH/2, SCREEN_HEIGHT/8))
@@ -646,13 +687,30 @@ class Game:
         screen.blit(back_text, back_rect)
 
 def main():
-    game = Game()
     global SCREEN_WIDTH, SCREEN_HEIGHT, screen
     
+    # Pick a game mode with: python snake_game.py --mode <name or schedule.json>
+    mode = 'classic'
+    if '--mode' in sys.argv and sys.argv.index('--mode') + 1 < len(sys.argv):
+        mode = sys.argv[sys.argv.index('--mode') + 1]
+    game = Game(mode)
+    
+    # Record replays with: python snake_game.py --record [directory]
+    if '--record' in sys.argv:
+        index = sys.argv.index('--record')
+        game.start_recording(sys.argv[index + 1] if index + 1 < len(sys.argv) else 'replays')
+    
     # Game loop
     while True:
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
+                # Keep an unfinished run so it can be continued next time
+                if game.run_in_progress():
+                    snapshot.save_snapshot(game, SCREEN_WIDTH, SCREEN_HEIGHT)
+                elif game.game_over or game.game_completed:
+                    # The run just ended, so any autosave from pausing it is stale
+                    snapshot.clear_snapshot()
+                game.finish_recording()
                 pygame.quit()
                 sys.exit()
             
@@ -682,6 +740,16 @@ def main():
                         # Show leaderboard
                         game.main_menu = False
                         game.show_leaderboard = True
+                    elif event.key == pygame.K_c and snapshot.has_snapshot():
+                        # Continue the saved run, paused so the player can get ready
+                        size = snapshot.load_snapshot(game)
+                        # An unreadable snapshot has been discarded; stay on the main menu
+                        if size is not None:
+                            if size != (SCREEN_WIDTH, SCREEN_HEIGHT):
+                                SCREEN_WIDTH, SCREEN_HEIGHT = size
+                                screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.RESIZABLE)
+                            game.main_menu = False
+                            game.game_paused = True
                 # Handle rules and leaderboard screens
                 elif game.show_rules or game.show_leaderboard:
                     if event.key == pygame.K_ESCAPE:
@@ -709,10 +777,15 @@ def main():
                 # Handle Shift key for pause/resume
                 elif (event.key == pygame.K_LSHIFT or event.key == pygame.K_RSHIFT) and game.game_started and not game.game_over and not game.game_completed:
                     game.game_paused = not game.game_paused
+                    if game.game_paused:
+                        # Autosave in the background so pausing doesn't stall the frame
+                        snapshot.save_snapshot(game, SCREEN_WIDTH, SCREEN_HEIGHT, background=True)
                 elif game.game_completed or game.game_over:
                     if event.key == pygame.K_SPACE:
                         # Save score before resetting
                         game.save_scores_history()
+                        game.finish_recording()
+                        snapshot.clear_snapshot()
                         game.reset()
                         if game.game_completed:
                             game.main_menu = True  # Go back to main menu after completion
@@ -722,6 +795,8 @@ def main():
                     elif event.key == pygame.K_ESCAPE:
                         # Save score and return to main menu
                         game.save_scores_history()
+                        game.finish_recording()
+                        snapshot.clear_snapshot()
                         game.game_over = False
                         game.main_menu = True
                         game.username = ""  # Clear username
@@ -0,0 +1,215 @@
+import os
+import sys
+import json
+import time
+import random
+import struct
+import argparse
+import threading
+from array import array
+from itertools import chain
+from pygame.math import Vector2
+from difficulty import schedule_from_spec
+
+SNAPSHOT_FILE = 'snake_snapshot.bin'
+
+# Decoding is dominated by building one Vector2 per cell: a board-filling snake on the
+# starting 20x20 grid loads in about 0.2 ms, on a 1080p window (96x54) in about 1.5 ms.
+# Run this module to measure it: python snapshot.py [WIDTHxHEIGHT ...]
+
+# File layout: fixed header, then body and obstacle cells as int16 (x, y) pairs,
+# the UTF-8 username, the Mersenne Twister state as 625 uint32 words and the
+# game mode's schedule as uint16-length-prefixed JSON
+MAGIC = b'SNKS'
+VERSION = 1
+HEADER = struct.Struct('<4sHBHHbbhhBBBiiIIHBBd')
+FLAG_NEW_BLOCK = 1
+FLAG_BW_MODE = 2
+FLAG_GAUSS_NEXT = 4
+RNG_WORDS = 625
+
+# Pause autosaves write in the background; keep them from racing the save on quit or a clear
+_write_lock = threading.Lock()
+_pending_write = None
+
+def _cells(vectors):
+    cells = array('h', map(int, chain.from_iterable(vectors)))
+    if sys.byteorder == 'big':
+        cells.byteswap()
+    return cells
+
+def _vectors(data, offset, count):
+    cells = array('h')
+    cells.frombytes(data[offset:offset + count * 4])
+    if sys.byteorder == 'big':
+        cells.byteswap()
+    # One Vector2 per cell is most of the decode time, so build them with map rather than a Python loop
+    return list(map(Vector2, cells[0::2], cells[1::2]))
+
+def encode_snapshot(game, width, height):
+    rng_version, rng_words, gauss_next = random.getstate()
+    username = game.username.encode('utf-8')
+
+    flags = 0
+    if game.snake.new_block:
+        flags |= FLAG_NEW_BLOCK
+    if game.bw_mode:
+        flags |= FLAG_BW_MODE
+    if gauss_next is not None:
+        flags |= FLAG_GAUSS_NEXT
+
+    header = HEADER.pack(
+        MAGIC, VERSION, flags, width, height,
+        int(game.snake.direction.x), int(game.snake.direction.y),
+        int(game.food.pos.x), int(game.food.pos.y), *game.food.color,
+        game.score, game.high_score, game.obstacle_count,
+        len(game.snake.body), len(game.obstacles), len(username), rng_version,
+        gauss_next or 0.0
+    )
+
+    rng = array('I', rng_words)
+    if sys.byteorder == 'big':
+        rng.byteswap()
+
+    schedule = json.dumps(game.schedule.spec, separators=(',', ':')).encode('utf-8')
+    return b''.join([header, _cells(game.snake.body), _cells(game.obstacles), username, rng.tobytes(),
+                     struct.pack('<H', len(schedule)), schedule])
+
+def decode_snapshot(game, data):
+    # Restore a snapshot into game and return the (width, height) it was taken at.
+    # Raises struct.error, ValueError, KeyError or TypeError for a truncated or foreign file
+    (magic, version, flags, width, height, dir_x, dir_y, food_x, food_y, r, g, b,
+     score, high_score, obstacle_count, body_len, obstacle_len, username_len, rng_version,
+     gauss_next) = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"Not a version {VERSION} snapshot")
+
+    offset = HEADER.size
+    if body_len < 1 or len(data) < offset + (body_len + obstacle_len) * 4 + username_len + RNG_WORDS * 4 + 2:
+        raise ValueError("Truncated snapshot")
+    body = _vectors(data, offset, body_len)
+    offset += body_len * 4
+    obstacles = _vectors(data, offset, obstacle_len)
+    offset += obstacle_len * 4
+    username = data[offset:offset + username_len].decode('utf-8')
+    offset += username_len
+
+    rng = array('I')
+    rng.frombytes(data[offset:offset + RNG_WORDS * rng.itemsize])
+    offset += RNG_WORDS * rng.itemsize
+    if sys.byteorder == 'big':
+        rng.byteswap()
+    rng_state = (rng_version, tuple(rng), gauss_next if flags & FLAG_GAUSS_NEXT else None)
+    random.Random().setstate(rng_state)  # Check the state on a spare generator before using it
+
+    (length,) = struct.unpack_from('<H', data, offset)
+    offset += 2
+    if len(data) != offset + length:
+        raise ValueError("Truncated snapshot")
+    schedule = schedule_from_spec(json.loads(data[offset:offset + length]))
+
+    # Only touch the game once the whole snapshot has parsed
+    game.reset()
+    game.snake.body = body
+    game.snake.direction = Vector2(dir_x, dir_y)
+    game.snake.new_block = bool(flags & FLAG_NEW_BLOCK)
+    game.food.pos = Vector2(food_x, food_y)
+    game.food.color = (r, g, b)
+    game.obstacles = obstacles
+    game.obstacle_count = obstacle_count
+    game.schedule = schedule
+    game.score = score
+    game.level = game.schedule.lookup(score)
+    game.high_score = max(game.high_score, high_score)
+    game.bw_mode = bool(flags & FLAG_BW_MODE)
+    game.username = username
+    random.setstate(rng_state)
+
+    return width, height
+
+def _write(path, data):
+    # Write beside the old snapshot and swap it in, so a crash never leaves half a file
+    tmp_path = path + '.tmp'
+    with _write_lock:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+def save_snapshot(game, width, height, path=SNAPSHOT_FILE, background=False):
+    # Encoding is done here so the snapshot matches this tick; only the disk write moves off-thread
+    global _pending_write
+
+    data = encode_snapshot(game, width, height)
+    if background:
+        thread = threading.Thread(target=_write, args=(path, data), daemon=True)
+        thread.start()
+        _pending_write = thread
+        return thread
+    _write(path, data)
+
+def load_snapshot(game, path=SNAPSHOT_FILE):
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+    try:
+        return decode_snapshot(game, data)
+    except (struct.error, ValueError, KeyError, TypeError):
+        # Truncated, foreign or from a newer version: drop it so the menu stops offering it
+        clear_snapshot(path)
+        return None
+
+def has_snapshot(path=SNAPSHOT_FILE):
+    return os.path.exists(path)
+
+def clear_snapshot(path=SNAPSHOT_FILE):
+    # Let an autosave still in flight land first, or it would put the cleared snapshot back
+    if _pending_write is not None:
+        _pending_write.join()
+    with _write_lock:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+def benchmark(width, height, runs):
+    # Median encode/decode time in ms for a snake filling every cell of a width x height window
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    import snake_game
+
+    grid_width, grid_height = width // snake_game.CELL_SIZE, height // snake_game.CELL_SIZE
+    game = snake_game.Game(leaderboard=None)
+    game.username = 'benchmark'
+    # Snake back and forth across the rows so the body covers the whole board
+    game.snake.body = [Vector2(x if y % 2 == 0 else grid_width - 1 - x, y)
+                       for y in range(grid_height) for x in range(grid_width)]
+
+    encode_times, decode_times = [], []
+    for _ in range(runs):
+        start = time.perf_counter()
+        data = encode_snapshot(game, width, height)
+        encode_times.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        decode_snapshot(game, data)
+        decode_times.append(time.perf_counter() - start)
+
+    encode_times.sort()
+    decode_times.sort()
+    return len(game.snake.body), len(data), encode_times[runs // 2] * 1000, decode_times[runs // 2] * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="Time snapshot encode/decode for a board-filling snake")
+    parser.add_argument('sizes', nargs='*', default=['400x400', '1920x1080'],
+                        help="window sizes to test, e.g. 1920x1080 (default: the starting window and 1080p)")
+    parser.add_argument('--runs', type=int, default=50, help="timed runs per size")
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        width, height = (int(value) for value in size.split('x'))
+        cells, data_size, encode_ms, decode_ms = benchmark(width, height, args.runs)
+        print(f"{size}: {cells} cells, {data_size} bytes, encode {encode_ms:.3f} ms, decode {decode_ms:.3f} ms (median of {args.runs})")
+
+if __name__ == "__main__":
+    main()
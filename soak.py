@@ -0,0 +1,258 @@
+import os
+import sys
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import tracemalloc
+
+# Headless: no window, no audio
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+from pygame.math import Vector2
+import snake_game
+from leaderboard import MAX_RECORDS
+
+DIRECTIONS = [Vector2(0, -1), Vector2(1, 0), Vector2(0, 1), Vector2(-1, 0)]
+
+# Games rotate through a fixed set of players, so scores_history and session_scores both fill
+# up during the warm-up and any growth after it is a leak
+PLAYERS = 2 * MAX_RECORDS
+
+def random_policy(game):
+    # Turn now and then, never straight back into the neck
+    if random.random() < 0.2:
+        direction = random.choice(DIRECTIONS)
+        if direction != -game.snake.direction:
+            return direction
+    return game.snake.direction
+
+def greedy_policy(game):
+    # Step towards the food along the wrap-aware shortest path, avoiding anything deadly next tick
+    head = game.snake.body[0]
+    width, height = snake_game.get_grid_width(), snake_game.get_grid_height()
+    blocked = {(int(pos.x), int(pos.y)) for pos in game.snake.body[:-1]}
+    blocked.update((int(pos.x), int(pos.y)) for pos in game.obstacles)
+
+    best, best_distance = None, None
+    for direction in DIRECTIONS:
+        if direction == -game.snake.direction:
+            continue
+        x = int(head.x + direction.x) % width
+        y = int(head.y + direction.y)
+        if y < 0 or y >= height or (x, y) in blocked:
+            continue
+        dx = abs(game.food.pos.x - x)
+        distance = min(dx, width - dx) + abs(game.food.pos.y - y)
+        if best_distance is None or distance < best_distance:
+            best, best_distance = direction, distance
+    return best or game.snake.direction
+
+POLICIES = {'random': random_policy, 'greedy': greedy_policy}
+
+def resident_memory():
+    # Current RSS in bytes where the platform exposes it, otherwise None
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def slope(samples):
+    # Least-squares growth per sample
+    n = len(samples)
+    if n < 2:
+        return 0.0
+    mean_x = (n - 1) / 2
+    mean_y = sum(samples) / n
+    numerator = sum((i - mean_x) * (y - mean_y) for i, y in enumerate(samples))
+    denominator = sum((i - mean_x) ** 2 for i in range(n))
+    return numerator / denominator
+
+def check_invariants(game, last_score):
+    errors = []
+    if game.score < last_score:
+        errors.append(f"score went down from {last_score} to {game.score}")
+    if len(game.scores_history) > MAX_RECORDS:
+        errors.append(f"scores_history holds {len(game.scores_history)} entries")
+
+    # A losing move legitimately overlaps the head with the body or an obstacle
+    if game.game_over:
+        return errors
+
+    cells = [(int(block.x), int(block.y)) for block in game.snake.body]
+    if len(set(cells)) != len(cells):
+        errors.append("snake body has duplicate cells")
+    if game.food.pos in game.snake.body:
+        errors.append(f"food at {game.food.pos} is on the snake")
+    if game.food.pos in game.obstacles:
+        errors.append(f"food at {game.food.pos} is on an obstacle")
+    return errors
+
+def soak(ticks, policy, sample_every, warmup_samples, trace_limit, rss_limit, mode='classic'):
+    game = snake_game.Game(mode)
+    game.main_menu = False
+    game.game_started = True
+    game.username = 'soak0'
+
+    violations = []
+    traced_samples, rss_samples, history_samples, session_samples = [], [], [], []
+    games = 0
+    last_score = 0
+    baseline = None
+
+    start_time = time.perf_counter()
+    for tick in range(1, ticks + 1):
+        game.snake.direction = policy(game)
+        game.update()
+
+        for error in check_invariants(game, last_score):
+            violations.append((tick, error))
+        last_score = game.score
+
+        if game.game_over or game.game_completed:
+            game.save_scores_history()
+            game.reset()
+            games += 1
+            game.username = f'soak{games % PLAYERS}'
+            last_score = 0
+
+        if tick % sample_every == 0:
+            traced_samples.append(tracemalloc.get_traced_memory()[0])
+            rss_samples.append(resident_memory())
+            history_samples.append(len(game.scores_history))
+            session_samples.append(len(game.session_scores))
+            if len(traced_samples) == warmup_samples:
+                baseline = tracemalloc.take_snapshot()
+    elapsed = time.perf_counter() - start_time
+    game.leaderboard.close()
+
+    # Trend checks only look at samples after the warm-up, once caches and the leaderboard are full
+    traced = traced_samples[warmup_samples:]
+    rss = [value for value in rss_samples[warmup_samples:] if value is not None]
+    history = history_samples[warmup_samples:]
+    sessions = session_samples[warmup_samples:]
+    failures = []
+    if slope(traced) * len(traced) > trace_limit:
+        failures.append(f"traced memory grew by about {slope(traced) * len(traced) / 1024:.1f} KiB after warm-up")
+    if slope(rss) * len(rss) > rss_limit:
+        failures.append(f"resident memory grew by about {slope(rss) * len(rss) / 1024:.1f} KiB after warm-up")
+    if slope(history) * len(history) >= 1:
+        failures.append(f"scores_history grew by about {slope(history) * len(history):.1f} entries after warm-up")
+    if slope(sessions) * len(sessions) >= 1:
+        failures.append(f"session_scores grew by about {slope(sessions) * len(sessions):.1f} entries after warm-up")
+    if violations:
+        failures.append(f"{len(violations)} invariant violations")
+
+    return {
+        'mode': game.schedule.name,
+        'ticks': ticks,
+        'games': games,
+        'elapsed': elapsed,
+        'violations': violations,
+        'failures': failures,
+        'traced_samples': traced_samples,
+        'rss_samples': rss_samples,
+        'history_samples': history_samples,
+        'session_samples': session_samples,
+        'baseline': baseline,
+        'final': tracemalloc.take_snapshot(),
+    }
+
+def format_report(result, top):
+    lines = []
+    lines.append(f"Mode: {result['mode']}")
+    lines.append(f"Ticks: {result['ticks']}  Games: {result['games']}  Time: {result['elapsed']:.1f}s")
+    lines.append(f"Throughput: {result['ticks'] / max(result['elapsed'], 1e-9):.0f} ticks/s (with tracemalloc)")
+
+    if result['traced_samples']:
+        lines.append(f"Traced memory: {result['traced_samples'][0] / 1024:.1f} KiB -> {result['traced_samples'][-1] / 1024:.1f} KiB")
+    rss = [value for value in result['rss_samples'] if value is not None]
+    if rss:
+        lines.append(f"Resident memory: {rss[0] / 1048576:.1f} MiB -> {rss[-1] / 1048576:.1f} MiB")
+    if result['history_samples']:
+        lines.append(f"scores_history: {result['history_samples'][0]} -> {result['history_samples'][-1]} entries (cap {MAX_RECORDS})")
+        lines.append(f"session_scores: {result['session_samples'][0]} -> {result['session_samples'][-1]} entries ({PLAYERS} players)")
+
+    # Ignore allocations made by the tracing machinery and the harness's own bookkeeping
+    filters = [
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        tracemalloc.Filter(False, __file__),
+    ]
+    final = result['final'].filter_traces(filters)
+
+    lines.append("")
+    lines.append("Allocation hot spots:")
+    for stat in final.statistics('lineno')[:top]:
+        lines.append(f"  {stat}")
+
+    if result['baseline'] is not None:
+        lines.append("")
+        lines.append("Growth since warm-up:")
+        for stat in final.compare_to(result['baseline'].filter_traces(filters), 'lineno')[:top]:
+            lines.append(f"  {stat}")
+
+    if result['violations']:
+        lines.append("")
+        lines.append("Invariant violations:")
+        for tick, error in result['violations'][:top]:
+            lines.append(f"  tick {tick}: {error}")
+
+    lines.append("")
+    if result['failures']:
+        lines.append("FAIL: " + "; ".join(result['failures']))
+    else:
+        lines.append("PASS")
+    return "\n".join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless long-run soak test for the Snake game")
+    parser.add_argument('--ticks', type=int, default=1000000, help="number of game ticks to play")
+    parser.add_argument('--policy', choices=sorted(POLICIES), default='greedy', help="input source")
+    parser.add_argument('--mode', default='classic', help="game mode name or schedule JSON file")
+    parser.add_argument('--seed', type=int, default=None, help="random seed for a reproducible run")
+    parser.add_argument('--samples', type=int, default=50, help="memory samples taken over the run")
+    parser.add_argument('--warmup-samples', type=int, default=5, help="samples ignored by the trend checks")
+    parser.add_argument('--trace-limit', type=int, default=256 * 1024, help="allowed traced growth in bytes")
+    parser.add_argument('--rss-limit', type=int, default=8 * 1048576, help="allowed resident growth in bytes")
+    parser.add_argument('--top', type=int, default=10, help="hot spots and violations to list")
+    parser.add_argument('--report', default=None, help="also write the report to this file")
+    parser.add_argument('--workdir', default=None, help="where the leaderboard and snapshots are written (default: temp dir)")
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+    if args.report:
+        args.report = os.path.abspath(args.report)
+    if os.path.exists(args.mode):
+        args.mode = os.path.abspath(args.mode)
+
+    # Keep the soak run's scores out of the real leaderboard
+    original_dir = os.getcwd()
+    workdir = args.workdir or tempfile.mkdtemp(prefix='snake_soak_')
+    os.chdir(workdir)
+
+    try:
+        tracemalloc.start()
+        result = soak(args.ticks, POLICIES[args.policy], max(args.ticks // args.samples, 1),
+                      args.warmup_samples, args.trace_limit, args.rss_limit, args.mode)
+        tracemalloc.stop()
+    finally:
+        os.chdir(original_dir)
+        # Only remove the directory we made; a --workdir is left for inspection
+        if args.workdir is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = format_report(result, args.top)
+    print(report)
+    if args.report:
+        with open(args.report, 'w') as f:
+            f.write(report + "\n")
+
+    sys.exit(1 if result['failures'] else 0)
+
+if __name__ == "__main__":
+    main()